@@ -1,16 +1,12 @@
 import traceback
 import time
-import ccxt
-import configparser
+import asyncio
+import ccxt.async_support as ccxt
 import pandas as pd
 import numpy as np
 
-# Load API keys from a config file
-config = configparser.ConfigParser()
-config.read('config.ini')
-
-api_key = config.get('BINANCE', 'API_KEY', fallback=None)
-api_secret = config.get('BINANCE', 'API_SECRET', fallback=None)
+# Load API keys from the shared cached config loader
+from config import api_key, api_secret
 
 # Initialize Binance exchange
 binance = ccxt.binance({
@@ -19,41 +15,39 @@ binance = ccxt.binance({
     'enableRateLimit': True,  # Enforce rate limits
 })
 
-# Synchronize time with Binance server
-binance.load_time_difference()
-
-def fetch_portfolio_free_above_one():
+async def fetch_portfolio_free_above_one():
     try:
-        # Initialize portfolios for spot and futures
-        spot_portfolio = []
-        futures_portfolio = []
-
-        # Fetch spot balances
-        spot_balance = binance.fetch_balance()
-        for asset_data in spot_balance['info']['balances']:
-            asset = asset_data['asset']
-            free_balance = float(asset_data['free'])  # Convert to float for comparison
+        # Synchronize time with Binance server
+        await binance.load_time_difference()
 
-            # Filter assets with free balance > 1
-            if free_balance > 1:
-                spot_portfolio.append({
-                    'asset': asset,
-                    'free_balance': free_balance,
-                    'wallet': 'spot'
-                })
+        # Fetch spot and futures balances concurrently - the two REST
+        # round-trips are independent, so they overlap instead of queueing.
+        spot_balance, futures_balance = await asyncio.gather(
+            binance.fetch_balance(),
+            binance.fetch_balance(params={'type': 'future'})
+        )
 
-        # Fetch futures balances
-        futures_balance = binance.fetch_balance(params={'type': 'future'})
-        for asset, details in futures_balance['total'].items():
-            free_balance = float(details)  # Futures balance is already aggregated as 'total'
+        # Filter assets with free balance > 1
+        spot_portfolio = [
+            {
+                'asset': asset_data['asset'],
+                'free_balance': float(asset_data['free']),
+                'wallet': 'spot'
+            }
+            for asset_data in spot_balance['info']['balances']
+            if float(asset_data['free']) > 1
+        ]
 
-            # Filter assets with free balance > 1
-            if free_balance > 1:
-                futures_portfolio.append({
-                    'asset': asset,
-                    'free_balance': free_balance,
-                    'wallet': 'futures'
-                })
+        # Futures balance is already aggregated as 'total'
+        futures_portfolio = [
+            {
+                'asset': asset,
+                'free_balance': float(details),
+                'wallet': 'futures'
+            }
+            for asset, details in futures_balance['total'].items()
+            if float(details) > 1
+        ]
 
         # Combine spot and futures portfolios
         combined_portfolio = spot_portfolio + futures_portfolio
@@ -68,5 +62,12 @@ def fetch_portfolio_free_above_one():
         print(f"Error fetching and filtering portfolio: {e}")
         return []
 
+async def run():
+    try:
+        return await fetch_portfolio_free_above_one()
+    finally:
+        await binance.close()
+
 # Fetch and process the portfolio
-portfolio = fetch_portfolio_free_above_one()
+if __name__ == "__main__":
+    portfolio = asyncio.run(run())
@@ -0,0 +1,34 @@
+"""
+Shared config.ini loader.
+
+Every script used to re-parse config.ini with configparser at import
+time. Parsing once per (path, mtime) and caching the result amortizes
+that cost across modules, and across worker processes spawned with the
+fork start method (the cached parse is shared copy-on-write).
+"""
+
+import configparser
+import functools
+import os
+
+CONFIG_FILE = 'config.ini'
+
+@functools.lru_cache(maxsize=4)
+def _parse(path, mtime):
+    parser = configparser.ConfigParser()
+    parser.read(path)
+    return parser
+
+def load_config(path=CONFIG_FILE):
+    """Return the parsed config, re-reading only when the file changes."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    return _parse(path, mtime)
+
+config = load_config()
+
+api_key = config.get('BINANCE', 'API_KEY', fallback=None)
+api_secret = config.get('BINANCE', 'API_SECRET', fallback=None)
+line_token = config.get('LINE', 'TOKEN', fallback=None)
@@ -0,0 +1,49 @@
+"""
+Shared helpers for the execution scripts.
+
+The short-TTL API cache and the batchOrders response parser used to be
+pasted into each execution script and had already drifted apart; like
+config.py, keeping one copy here means a fix lands everywhere at once.
+"""
+
+import time
+
+class TTLCache:
+    """
+    Short-TTL cache for balance/ticker lookups so back-to-back calls in
+    the same order flow do not repeat the REST round-trip. Each script
+    picks its own ttl: a tight one for order flow that must re-check,
+    a longer one for values that are stable across a whole run.
+    """
+    def __init__(self, ttl=0.5):
+        self.ttl = ttl
+        self._store = {}
+
+    def get(self, key):
+        entry = self._store.get(key)
+        if entry is not None and time.time() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def set(self, key, value):
+        self._store[key] = (time.time(), value)
+
+    def clear(self):
+        self._store.clear()
+
+def parse_batch_order(raw, symbol, side, amount):
+    """
+    Map one entry of a batchOrders response onto the order dict shape the
+    execution scripts expect. Entries that failed come back as
+    {'code': ..., 'msg': ...} and raise so the caller's handler sees them.
+    """
+    if 'orderId' not in raw:
+        raise ValueError(f"Batch order for {symbol} rejected: {raw.get('msg', raw)}")
+    return {
+        'id': str(raw['orderId']),
+        'symbol': symbol,
+        'side': side,
+        'status': raw.get('status', 'unknown').lower(),
+        'filled': float(raw.get('executedQty', 0) or 0),
+        'amount': amount
+    }
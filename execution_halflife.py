@@ -1,19 +1,17 @@
 import traceback
 import time
-import ccxt
-import configparser
-import pandas as pd
+import asyncio
+import json
+import csv
+import ccxt.async_support as ccxt
 import numpy as np
 import math
 
 # ---------------------------
-# Load API keys from a config file
+# Load API keys from the shared cached config loader
 # ---------------------------
-config = configparser.ConfigParser()
-config.read('config.ini')
-
-api_key = config.get('BINANCE', 'API_KEY', fallback=None)
-api_secret = config.get('BINANCE', 'API_SECRET', fallback=None)
+from config import api_key, api_secret
+from exchange_utils import TTLCache, parse_batch_order
 
 if not api_key or not api_secret:
     raise ValueError("API Key and Secret must be set in the config.ini file under the [BINANCE] section.")
@@ -28,13 +26,33 @@ binance_futures = ccxt.binanceusdm({
     }
 })
 
-def place_orders(long_pair, short_pair, long_amount, short_amount):
+# Short-TTL cache for balance/ticker lookups so back-to-back calls in the
+# same order flow do not repeat the REST round-trip.
+_api_cache = TTLCache(ttl=0.5)
+
+async def fetch_balance_cached():
+    """Fetch the futures balance, reusing a recent result if available."""
+    value = _api_cache.get('balance')
+    if value is None:
+        value = await binance_futures.fetch_balance(params={'type': 'future'})
+        _api_cache.set('balance', value)
+    return value
+
+async def fetch_ticker_cached(symbol):
+    """Fetch a ticker, reusing a recent result if available."""
+    value = _api_cache.get(('ticker', symbol))
+    if value is None:
+        value = await binance_futures.fetch_ticker(symbol)
+        _api_cache.set(('ticker', symbol), value)
+    return value
+
+async def place_orders(long_pair, short_pair, long_amount, short_amount):
     """
     Place a long and short order on the futures market.
     """
     try:
         print("\n--- Fetching Balances ---")
-        futures_balance_info = binance_futures.fetch_balance(params={'type': 'future'})
+        futures_balance_info = await fetch_balance_cached()
         futures_free_margin = float(futures_balance_info['free']['USDT'])
         print(f"Futures Free Margin: {futures_free_margin:.2f} USDT")
 
@@ -42,74 +60,134 @@ def place_orders(long_pair, short_pair, long_amount, short_amount):
         if total_required > futures_free_margin:
             raise ValueError(f"Insufficient futures free margin. Available: {futures_free_margin:.2f}, Required: {total_required:.2f}")
 
+        # Fetch both tickers concurrently - the two round-trips overlap.
         print("\n--- Fetching Current Prices ---")
-        long_ticker = binance_futures.fetch_ticker(long_pair)
-        short_ticker = binance_futures.fetch_ticker(short_pair)
+        long_ticker, short_ticker = await asyncio.gather(
+            fetch_ticker_cached(long_pair),
+            fetch_ticker_cached(short_pair)
+        )
         long_price = long_ticker['last']
         short_price = short_ticker['last']
         print(f"Long Pair ({long_pair}) Price: {long_price:.4f} USDT")
         print(f"Short Pair ({short_pair}) Price: {short_price:.4f} USDT")
 
-        long_quantity = long_amount / long_price
-        short_quantity = short_amount / short_price
+        # The raw batch endpoint does not round for us: quantize each leg
+        # to its market's lot size up front, as decimal strings (a bare
+        # f-string can render tiny floats as 1e-05, which Binance rejects).
+        if not binance_futures.markets:
+            await binance_futures.load_markets()
+        long_qty = binance_futures.amount_to_precision(long_pair, long_amount / long_price)
+        short_qty = binance_futures.amount_to_precision(short_pair, short_amount / short_price)
+        long_quantity = float(long_qty)
+        short_quantity = float(short_qty)
         print(f"Placing Orders: Long {long_pair} ({long_quantity:.4f}) and Short {short_pair} ({short_quantity:.4f})")
 
-        print("\n--- Placing Long Order ---")
-        long_order = binance_futures.create_order(
-            symbol=long_pair,
-            type='market',
-            side='buy',
-            amount=long_quantity
-        )
+        # Submit both legs in a single signed batchOrders request so the
+        # exchange receives them together - one round-trip, minimal skew.
+        print("\n--- Placing Orders ---")
+        batch = [
+            {
+                'symbol': long_pair.replace('/', ''),
+                'side': 'BUY',
+                'type': 'MARKET',
+                'quantity': long_qty
+            },
+            {
+                'symbol': short_pair.replace('/', ''),
+                'side': 'SELL',
+                'type': 'MARKET',
+                'quantity': short_qty
+            }
+        ]
+        raw_orders = await binance_futures.fapiPrivatePostBatchOrders({
+            'batchOrders': json.dumps(batch)
+        })
+
+        # The batch is not atomic: entries fail independently. If exactly
+        # one leg was rejected, reverse the accepted leg immediately so
+        # the book is never one-sided.
+        long_ok = 'orderId' in raw_orders[0]
+        short_ok = 'orderId' in raw_orders[1]
+        if long_ok != short_ok:
+            pair, side, qty, rejected = (
+                (long_pair, 'sell', long_quantity, raw_orders[1]) if long_ok
+                else (short_pair, 'buy', short_quantity, raw_orders[0])
+            )
+            print(f"One leg rejected ({rejected.get('msg', rejected)}); reversing the filled leg {pair}...")
+            await binance_futures.create_order(
+                symbol=pair,
+                type='market',
+                side=side,
+                amount=qty
+            )
+            # The book is flat again; the except handler below must not
+            # reverse this leg a second time when the rejected leg's
+            # parse raises.
+            leg_unwound = True
+        long_order = parse_batch_order(raw_orders[0], long_pair, 'buy', long_quantity)
+        short_order = parse_batch_order(raw_orders[1], short_pair, 'sell', short_quantity)
         print(f"Long Order Placed: {long_order['id']} | Status: {long_order['status']} | Filled: {long_order['filled']}")
-
-        print("\n--- Placing Short Order ---")
-        short_order = binance_futures.create_order(
-            symbol=short_pair,
-            type='market',
-            side='sell',
-            amount=short_quantity
-        )
         print(f"Short Order Placed: {short_order['id']} | Status: {short_order['status']} | Filled: {short_order['filled']}")
 
+        # Balances and prices are stale once the orders fill.
+        _api_cache.clear()
+
         return [long_order, short_order]
 
     except ccxt.InsufficientFunds as e:
         print(f"\nError: Insufficient funds - {e}")
         print("Tip: Check your futures free margin or reduce the trade amount.")
     except Exception as e:
+        # Flatten any leg that is known to be live (and was not already
+        # reversed above) before printing diagnostics.
+        frame = locals()
+        live = [order for order in (frame.get('long_order'), frame.get('short_order'))
+                if order is not None]
+        if live and not frame.get('leg_unwound'):
+            await close_positions(live)
         print(f"\nError: {e}")
         traceback.print_exc()
         return []
 
-def close_positions(orders):
+async def close_positions(orders):
     """
     Closes the active positions by placing reverse orders with the 'reduceOnly' flag.
     This assumes that each order in 'orders' was fully executed.
     """
     try:
         print("\n--- Closing Positions ---")
+        batch = []
         for order in orders:
             symbol = order['symbol']
             original_side = order['side']
             # Determine the opposite side: sell to close a long, buy to close a short.
             close_side = 'sell' if original_side == 'buy' else 'buy'
             # Use the 'filled' amount if available; otherwise, fall back to the original 'amount'
-            amount = order.get('filled', order['amount'])
+            amount = order.get('filled') or order['amount']
             print(f"Closing position for {symbol}: placing {close_side} order for {amount:.4f}")
-            close_order = binance_futures.create_order(
-                symbol=symbol,
-                type='market',
-                side=close_side,
-                amount=amount,
-                params={'reduceOnly': True}
-            )
-            print(f"Close order placed for {symbol}: {close_order['id']} | Status: {close_order['status']}")
+            batch.append({
+                'symbol': symbol.replace('/', ''),
+                'side': close_side.upper(),
+                'type': 'MARKET',
+                # Same rule as on entry: the raw endpoint wants a decimal
+                # string already quantized to the lot size.
+                'quantity': binance_futures.amount_to_precision(symbol, amount),
+                'reduceOnly': 'true'
+            })
+        # One signed request closes every leg at once.
+        raw_orders = await binance_futures.fapiPrivatePostBatchOrders({
+            'batchOrders': json.dumps(batch)
+        })
+        for order, raw in zip(orders, raw_orders):
+            close_order = parse_batch_order(raw, order['symbol'],
+                                             'sell' if order['side'] == 'buy' else 'buy',
+                                             order.get('filled') or order['amount'])
+            print(f"Close order placed for {order['symbol']}: {close_order['id']} | Status: {close_order['status']}")
     except Exception as e:
         print(f"Error closing positions: {e}")
         traceback.print_exc()
 
-def main():
+async def main():
     print("Welcome to the Crypto Arbitrage Program!")
 
     # Prompt the user for inputs
@@ -125,16 +203,18 @@ def main():
     print(f"Short Amount: {short_amount:.2f} USDT")
 
     # Load half-life value from df_halflife_only.csv.
-    # Assume the CSV has two columns: 'pair' and 'value'
-    df_halflife = pd.read_csv("df_halflife_only.csv", header=None, names=["pair", "value"])
+    # The CSV has two columns ('pair' and 'value') and a handful of rows,
+    # so the stdlib csv module is enough - no pandas import/parse needed
+    # just to look up one number.
+    with open("df_halflife_only.csv", newline="") as f:
+        halflife_table = {row[0]: float(row[1]) for row in csv.reader(f) if row}
     # Standardize the pair key: sort the two inputs and join with a colon, then append '_halflife'
     pairs = sorted([long_pair, short_pair])
     pair_key = f"{pairs[0]}:{pairs[1]}_halflife"
-    row = df_halflife[df_halflife["pair"] == pair_key]
-    if row.empty:
+    if pair_key not in halflife_table:
         print(f"Could not find half-life value for pair {pair_key} in df_halflife_only.csv.")
         return
-    half_life_value = float(row["value"].values[0])
+    half_life_value = halflife_table[pair_key]
     half_life_rounded = math.ceil(half_life_value)
     
     print(f"\nRetrieved half-life for {pair_key}: {half_life_value:.2f} hours (rounded up to {half_life_rounded} hours).")
@@ -144,14 +224,23 @@ def main():
         return
 
     print("Executing trades...")
-    placed_orders = place_orders(long_pair, short_pair, long_amount, short_amount)
+    placed_orders = await place_orders(long_pair, short_pair, long_amount, short_amount)
 
     # Schedule auto-close using the half-life value retrieved from the CSV.
     if placed_orders:
         print(f"Waiting {half_life_rounded} hours to automatically close positions...")
-        time.sleep(half_life_rounded * 3600)
+        # asyncio.sleep instead of time.sleep: the event loop stays free, so
+        # sibling monitoring tasks (e.g. a PNL alerter) can run concurrently
+        # on the same client while the half-life window elapses.
+        await asyncio.sleep(half_life_rounded * 3600)
         print("Half-life period reached. Closing positions...")
-        close_positions(placed_orders)
+        await close_positions(placed_orders)
+
+async def run():
+    try:
+        await main()
+    finally:
+        await binance_futures.close()
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(run())
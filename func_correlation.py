@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 class CorrelationCalculator:
@@ -17,29 +18,27 @@ class CorrelationCalculator:
         # 1) Compute the correlation matrix.
         corr_matrix = trading_pct_change.corr()
 
-        # 2) Flatten the upper triangle.
-        pairs = []
-        cols = corr_matrix.columns
-        for i in range(len(cols)):
-            for j in range(i + 1, len(cols)):
-                col1, col2 = cols[i], cols[j]
-                # Remove ":USDT" from the names.
-                col1_clean = col1.replace(":USDT", "")
-                col2_clean = col2.replace(":USDT", "")
-                pair_name = f"{col1_clean}:{col2_clean}"
-                cor_value = corr_matrix.iloc[i, j]
-                pairs.append((pair_name, cor_value))
+        # 2) Flatten the upper triangle in one vectorized operation.
+        M = corr_matrix.to_numpy()
+        iu, ju = np.triu_indices(M.shape[0], k=1)
+        vals = M[iu, ju]
 
         # 3) Filter only pairs with correlation > threshold.
-        filtered_pairs = [(pn, cv) for (pn, cv) in pairs if cv > self.threshold]
+        keep = vals > self.threshold
+        vals = vals[keep]
+        iu, ju = iu[keep], ju[keep]
 
         # 4) Sort descending by correlation value.
-        filtered_pairs.sort(key=lambda x: x[1], reverse=True)
+        order = np.argsort(-vals)
 
         # 5) Build dictionary for the final single-row DataFrame.
+        # Remove ":USDT" from the symbol names.
+        cols = corr_matrix.columns.str.replace(":USDT", "", regex=False).to_numpy()
         correlation_dict = {}
         print("=== Pairs with correlation > {:.2f} (sorted high -> low) ===".format(self.threshold))
-        for pair_name, cor_value in filtered_pairs:
+        for idx in order:
+            pair_name = f"{cols[iu[idx]]}:{cols[ju[idx]]}"
+            cor_value = vals[idx]
             correlation_dict[pair_name] = cor_value
             print(f"{pair_name} => correlation = {cor_value:.2f}")
 
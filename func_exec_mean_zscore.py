@@ -1,19 +1,27 @@
 import traceback
 import time
+import asyncio
+import collections
+import csv
+import datetime
+import functools
+import os
 import ccxt
-import configparser
-import pandas as pd
+import ccxt.async_support as ccxt_async
 import numpy as np
-import math
+
+# ccxt.pro provides WebSocket streaming; fall back to REST polling if the
+# installed ccxt build does not ship it.
+try:
+    import ccxt.pro as ccxtpro
+except ImportError:
+    ccxtpro = None
 
 # ---------------------------
-# Load API keys from config.ini
+# Load API keys from the shared cached config loader
 # ---------------------------
-config = configparser.ConfigParser()
-config.read('config.ini')
-
-api_key = config.get('BINANCE', 'API_KEY', fallback=None)
-api_secret = config.get('BINANCE', 'API_SECRET', fallback=None)
+from config import api_key, api_secret
+from exchange_utils import TTLCache
 
 if not api_key or not api_secret:
     raise ValueError("API Key and Secret must be set in the config.ini file under the [BINANCE] section.")
@@ -28,13 +36,58 @@ binance_futures = ccxt.binanceusdm({
     }
 })
 
-def place_orders(long_pair, short_pair, long_amount, short_amount):
+def _new_async_client():
+    """Build an async Binance USDT-M client with the standard options."""
+    return ccxt_async.binanceusdm({
+        'apiKey': api_key,
+        'secret': api_secret,
+        'enableRateLimit': True,
+        'options': {
+            'adjustForTimeDifference': True
+        }
+    })
+
+# Async twin of the client above, shared across calls so concurrent
+# fetches (OHLCV for both legs, both order submissions) overlap their
+# network round-trips instead of running back to back. Once closed, a
+# ccxt client cannot be reused (and is bound to its first event loop),
+# so the sync wrappers below build a short-lived client per call instead
+# of closing this one.
+binance_futures_async = _new_async_client()
+
+# Short-TTL cache for balance/ticker lookups so back-to-back calls in the
+# same order flow do not repeat the REST round-trip.
+_api_cache = TTLCache(ttl=0.5)
+
+async def fetch_balance_cached(exchange=None):
+    """Fetch the futures balance, reusing a recent result if available."""
+    exchange = exchange or binance_futures_async
+    value = _api_cache.get('balance')
+    if value is None:
+        value = await exchange.fetch_balance(params={'type': 'future'})
+        _api_cache.set('balance', value)
+    return value
+
+async def fetch_ticker_cached(symbol, exchange=None):
+    """Fetch a ticker, reusing a recent result if available."""
+    exchange = exchange or binance_futures_async
+    value = _api_cache.get(('ticker', symbol))
+    if value is None:
+        value = await exchange.fetch_ticker(symbol)
+        _api_cache.set(('ticker', symbol), value)
+    return value
+
+async def place_orders_async(long_pair, short_pair, long_amount, short_amount,
+                             exchange=None):
     """
-    Place a long and short order on the futures market.
+    Place a long and short order on the futures market. Both ticker
+    fetches and both order submissions run concurrently - the round-trips
+    overlap, so the two legs hit the exchange with minimal skew.
     """
+    exchange = exchange or binance_futures_async
     try:
         print("\n--- Fetching Balances ---")
-        futures_balance_info = binance_futures.fetch_balance(params={'type': 'future'})
+        futures_balance_info = await fetch_balance_cached(exchange)
         futures_free_margin = float(futures_balance_info['free']['USDT'])
         print(f"Futures Free Margin: {futures_free_margin:.2f} USDT")
 
@@ -43,8 +96,10 @@ def place_orders(long_pair, short_pair, long_amount, short_amount):
             raise ValueError(f"Insufficient futures free margin. Available: {futures_free_margin:.2f}, Required: {total_required:.2f}")
 
         print("\n--- Fetching Current Prices ---")
-        long_ticker = binance_futures.fetch_ticker(long_pair)
-        short_ticker = binance_futures.fetch_ticker(short_pair)
+        long_ticker, short_ticker = await asyncio.gather(
+            fetch_ticker_cached(long_pair, exchange),
+            fetch_ticker_cached(short_pair, exchange)
+        )
         long_price = long_ticker['last']
         short_price = short_ticker['last']
         print(f"Long Pair ({long_pair}) Price: {long_price:.4f} USDT")
@@ -54,24 +109,27 @@ def place_orders(long_pair, short_pair, long_amount, short_amount):
         short_quantity = short_amount / short_price
         print(f"Placing Orders: Long {long_pair} ({long_quantity:.4f}) and Short {short_pair} ({short_quantity:.4f})")
 
-        print("\n--- Placing Long Order ---")
-        long_order = binance_futures.create_order(
-            symbol=long_pair,
-            type='market',
-            side='buy',
-            amount=long_quantity
+        print("\n--- Placing Orders ---")
+        long_order, short_order = await asyncio.gather(
+            exchange.create_order(
+                symbol=long_pair,
+                type='market',
+                side='buy',
+                amount=long_quantity
+            ),
+            exchange.create_order(
+                symbol=short_pair,
+                type='market',
+                side='sell',
+                amount=short_quantity
+            )
         )
         print(f"Long Order Placed: {long_order['id']} | Status: {long_order['status']} | Filled: {long_order['filled']}")
-
-        print("\n--- Placing Short Order ---")
-        short_order = binance_futures.create_order(
-            symbol=short_pair,
-            type='market',
-            side='sell',
-            amount=short_quantity
-        )
         print(f"Short Order Placed: {short_order['id']} | Status: {short_order['status']} | Filled: {short_order['filled']}")
 
+        # Balances and prices are stale once the orders fill.
+        _api_cache.clear()
+
         return [long_order, short_order]
 
     except ccxt.InsufficientFunds as e:
@@ -82,6 +140,24 @@ def place_orders(long_pair, short_pair, long_amount, short_amount):
         traceback.print_exc()
         return []
 
+def place_orders(long_pair, short_pair, long_amount, short_amount):
+    """
+    Synchronous wrapper around place_orders_async for callers outside an
+    event loop. Runs on its own short-lived client: asyncio.run builds a
+    fresh loop per call, and a closed ccxt client raises on any further
+    request, so closing the shared module-level client here would break
+    every later call in the process.
+    """
+    async def _run():
+        exchange = _new_async_client()
+        try:
+            return await place_orders_async(long_pair, short_pair,
+                                            long_amount, short_amount,
+                                            exchange=exchange)
+        finally:
+            await exchange.close()
+    return asyncio.run(_run())
+
 def close_orders(orders):
     """
     Closes the given orders by canceling them using the Binance Futures API.
@@ -98,50 +174,261 @@ def close_orders(orders):
         print(f"Error closing orders: {e}")
         traceback.print_exc()
 
-def get_current_zscore(pair1, pair2, hedge_ratio, window=20, timeframe='1h'):
+async def get_current_zscore(pair1, pair2, hedge_ratio, window=20, timeframe='1h',
+                             exchange=None):
     """
     Fetches the most recent OHLCV data for two symbols from Binance,
     computes the spread as: spread = close(pair1) - hedge_ratio * close(pair2),
     calculates the rolling mean and standard deviation over the last 'window' candles,
-    and returns the z-score of the most recent spread.
-    
+    and returns the z-score of the most recent spread. Both OHLCV
+    downloads run concurrently, so the call costs one round-trip of
+    latency instead of two.
+
     Parameters:
       - pair1 (str): e.g., "ALT/USDT"
       - pair2 (str): e.g., "ZIL/USDT"
       - hedge_ratio (float): Retrieved from df_cointegrated_pairs.csv.
       - window (int): Number of recent candles to use (default: 20)
       - timeframe (str): OHLCV timeframe to fetch (default: '1h')
-      
+
     Returns:
       float: The current z-score, or None if an error occurs.
     """
+    exchange = exchange or binance_futures_async
     try:
-        binance_futures.load_markets()
-        ohlcv1 = binance_futures.fetch_ohlcv(pair1, timeframe=timeframe, limit=window)
-        ohlcv2 = binance_futures.fetch_ohlcv(pair2, timeframe=timeframe, limit=window)
-        
-        closes1 = [candle[4] for candle in ohlcv1]
-        closes2 = [candle[4] for candle in ohlcv2]
-        
+        # Load markets only once; re-downloading the full instrument list
+        # on every poll is a large request and parse for no new information.
+        if not exchange.markets:
+            await exchange.load_markets()
+        ohlcv1, ohlcv2 = await asyncio.gather(
+            exchange.fetch_ohlcv(pair1, timeframe=timeframe, limit=window),
+            exchange.fetch_ohlcv(pair2, timeframe=timeframe, limit=window)
+        )
+
+        # One C-level conversion and slice per leg; no per-candle Python
+        # dispatch on a function that runs every TP/SL tick.
+        closes1 = np.asarray(ohlcv1, dtype=np.float64)[:, 4]
+        closes2 = np.asarray(ohlcv2, dtype=np.float64)[:, 4]
+
         if len(closes1) < window or len(closes2) < window:
             raise ValueError("Not enough data to compute z-score.")
-        
-        spread = [c1 - hedge_ratio * c2 for c1, c2 in zip(closes1, closes2)]
-        
-        mean_spread = sum(spread) / len(spread)
-        std_spread = math.sqrt(sum((x - mean_spread) ** 2 for x in spread) / len(spread))
-        
+
+        spread = closes1 - hedge_ratio * closes2
+
+        mean_spread = spread.mean()
+        std_spread = spread.std(ddof=0)
+
         if std_spread == 0:
             return 0.0
-        
-        current_zscore = (spread[-1] - mean_spread) / std_spread
+
+        current_zscore = float((spread[-1] - mean_spread) / std_spread)
         return current_zscore
-    
+
     except Exception as e:
         print(f"Error computing z-score for {pair1}:{pair2}: {e}")
         traceback.print_exc()
         return None
 
+def get_current_zscore_sync(pair1, pair2, hedge_ratio, window=20, timeframe='1h'):
+    """
+    Synchronous wrapper around get_current_zscore for callers outside an
+    event loop. Same per-call client as place_orders: the shared client
+    must stay open for the rest of the process.
+    """
+    async def _run():
+        exchange = _new_async_client()
+        try:
+            return await get_current_zscore(pair1, pair2, hedge_ratio,
+                                            window=window, timeframe=timeframe,
+                                            exchange=exchange)
+        finally:
+            await exchange.close()
+    return asyncio.run(_run())
+
+class RollingStats:
+    """
+    Rolling mean/std over a fixed window, updated in O(1) per sample by
+    maintaining the running sum and sum of squares instead of recomputing
+    over the whole window on every tick.
+    """
+    def __init__(self, n):
+        self.buf = collections.deque(maxlen=n)
+        self.s = 0.0
+        self.s2 = 0.0
+
+    def push(self, x):
+        if len(self.buf) == self.buf.maxlen:
+            old = self.buf[0]
+            self.s -= old
+            self.s2 -= old * old
+        self.buf.append(x)
+        self.s += x
+        self.s2 += x * x
+
+    def replace_last(self, x):
+        """Update the still-open bar in place."""
+        old = self.buf[-1]
+        self.s += x - old
+        self.s2 += x * x - old * old
+        self.buf[-1] = x
+
+    def mean(self):
+        return self.s / len(self.buf)
+
+    def std(self):
+        m = self.mean()
+        var = self.s2 / len(self.buf) - m * m
+        return var ** 0.5 if var > 0 else 0.0
+
+def zscore_condition_met(current_z, mean_zscore_value):
+    """
+    If current zscore > 0, close when it falls back to the mean zscore.
+    If current zscore < 0, close when it rises back to the mean zscore.
+    """
+    return (current_z > 0 and current_z <= mean_zscore_value) or \
+           (current_z < 0 and current_z >= mean_zscore_value)
+
+async def watch_zscore_until_close(pair1, pair2, hedge_ratio, mean_zscore_value,
+                                   window=20, timeframe='1h'):
+    """
+    Stream OHLCV for both legs over WebSocket (ccxt.pro) and return once
+    the z-score crosses back through the pair's mean z-score. The rolling
+    windows are seeded with one REST call per leg; after that every update
+    is pushed by the exchange instead of polled every 5 minutes.
+    """
+    exchange = ccxtpro.binanceusdm({
+        'apiKey': api_key,
+        'secret': api_secret,
+        'enableRateLimit': True,
+        'options': {
+            'adjustForTimeDifference': True
+        }
+    })
+    try:
+        # Seed the rolling buffers once over REST.
+        ohlcv1, ohlcv2 = await asyncio.gather(
+            exchange.fetch_ohlcv(pair1, timeframe=timeframe, limit=window),
+            exchange.fetch_ohlcv(pair2, timeframe=timeframe, limit=window)
+        )
+        buf1 = collections.deque(([c[0], c[4]] for c in ohlcv1), maxlen=window)
+        buf2 = collections.deque(([c[0], c[4]] for c in ohlcv2), maxlen=window)
+
+        # Seed the incremental rolling stats with the aligned seed spreads.
+        stats = RollingStats(window)
+        for c1, c2 in zip(ohlcv1, ohlcv2):
+            stats.push(c1[4] - hedge_ratio * c2[4])
+        last_bar = max(buf1[-1][0], buf2[-1][0]) if buf1 and buf2 else 0
+
+        while True:
+            try:
+                candles1, candles2 = await asyncio.gather(
+                    exchange.watch_ohlcv(pair1, timeframe),
+                    exchange.watch_ohlcv(pair2, timeframe)
+                )
+            except ccxt.NetworkError as e:
+                # A connection blip during an hours-long session must not
+                # propagate and kill the process while positions are open;
+                # the next watch_ohlcv call resubscribes the stream.
+                print(f"WebSocket error for {pair1}:{pair2}: {e}. Reconnecting...")
+                await asyncio.sleep(5)
+                continue
+            # Update the live bar in place; append when a new bar opens.
+            for buf, candles in ((buf1, candles1), (buf2, candles2)):
+                for candle in candles:
+                    if buf and buf[-1][0] == candle[0]:
+                        buf[-1][1] = candle[4]
+                    elif not buf or candle[0] > buf[-1][0]:
+                        buf.append([candle[0], candle[4]])
+
+            # O(1) update: replace the open bar's spread, or push when a
+            # new bar has opened, instead of recomputing the whole window.
+            spread_now = buf1[-1][1] - hedge_ratio * buf2[-1][1]
+            bar_ts = max(buf1[-1][0], buf2[-1][0])
+            if bar_ts > last_bar:
+                stats.push(spread_now)
+                last_bar = bar_ts
+            else:
+                stats.replace_last(spread_now)
+
+            std_spread = stats.std()
+            if std_spread == 0:
+                continue
+            current_z = (spread_now - stats.mean()) / std_spread
+            if zscore_condition_met(current_z, mean_zscore_value):
+                print(f"Current z-score for {pair1}:{pair2} = {current_z:.2f}")
+                return True
+    finally:
+        await exchange.close()
+
+def poll_zscore_until_close(pair1, pair2, hedge_ratio, mean_zscore_value,
+                            window=20, timeframe='1h', poll_interval=300):
+    """
+    REST monitoring loop used when ccxt.pro is unavailable. The rolling
+    buffer is seeded once from fetch_ohlcv per leg; after that every poll
+    is a single fetch_tickers call returning both last prices together -
+    one round-trip instead of two OHLCV downloads per check. The window
+    is re-seeded from OHLCV on the hourly bar boundary so the rolling
+    stats stay aligned with closed candles.
+    """
+    stats = None
+    last_seed_hour = None
+    while True:
+        try:
+            now = datetime.datetime.utcnow()
+            bar_hour = now.replace(minute=0, second=0, microsecond=0)
+            if stats is None or bar_hour != last_seed_hour:
+                # Seed (or re-seed on a new bar) from closed candles.
+                ohlcv1 = binance_futures.fetch_ohlcv(pair1, timeframe=timeframe, limit=window)
+                ohlcv2 = binance_futures.fetch_ohlcv(pair2, timeframe=timeframe, limit=window)
+                stats = RollingStats(window)
+                for c1, c2 in zip(ohlcv1, ohlcv2):
+                    stats.push(c1[4] - hedge_ratio * c2[4])
+                last_seed_hour = bar_hour
+            else:
+                # Both last prices come back in one REST request. The
+                # result is keyed by unified swap symbols (XXX/USDT:USDT),
+                # so the prompt-style names are mapped through market().
+                tickers = binance_futures.fetch_tickers([pair1, pair2])
+                last1 = tickers[binance_futures.market(pair1)['symbol']]['last']
+                last2 = tickers[binance_futures.market(pair2)['symbol']]['last']
+                spread_now = last1 - hedge_ratio * last2
+                stats.replace_last(spread_now)
+
+            std_spread = stats.std()
+            if std_spread > 0:
+                current_z = (stats.buf[-1] - stats.mean()) / std_spread
+                print(f"Current z-score for {pair1}:{pair2} = {current_z:.2f}")
+                if zscore_condition_met(current_z, mean_zscore_value):
+                    return True
+        except Exception as e:
+            print(f"Error polling z-score for {pair1}:{pair2}: {e}")
+            traceback.print_exc()
+        time.sleep(poll_interval)
+
+def _file_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+# Lookup-table loaders cached per (path, mtime), same pattern as the
+# shared config loader: the files are re-parsed only when they change on
+# disk, not on every call.
+@functools.lru_cache(maxsize=8)
+def _load_mean_halflife_row(path, mtime):
+    with open(path, newline="") as f:
+        return next(csv.DictReader(f))
+
+@functools.lru_cache(maxsize=8)
+def _load_hedge_ratios(path, mtime):
+    with open(path, newline="") as f:
+        return {tuple(sorted((row["sym_1"], row["sym_2"]))): float(row["hedge_ratio"])
+                for row in csv.DictReader(f)}
+
+def load_hedge_ratios(path="df_cointegrated_pairs.csv"):
+    """Hedge ratios keyed by sorted pair, re-read only when the CSV changes."""
+    return _load_hedge_ratios(path, _file_mtime(path))
+
 def get_mean_zscore(long_pair, short_pair):
     """
     Loads 'df_mean_halflife.csv' and returns the mean zscore for the given pair.
@@ -151,13 +438,17 @@ def get_mean_zscore(long_pair, short_pair):
     then appending "_mean_zscore".
     """
     try:
-        df_zmean = pd.read_csv("df_mean_halflife.csv")
+        # The CSV is a single row of named values; the stdlib csv module
+        # reads it as a dict without dragging in pandas for one lookup,
+        # and the mtime-keyed cache skips the re-parse on repeat calls.
+        row = _load_mean_halflife_row("df_mean_halflife.csv",
+                                      _file_mtime("df_mean_halflife.csv"))
         pairs = sorted([long_pair.strip(), short_pair.strip()])
         key = f"{pairs[0]}:{pairs[1]}_mean_zscore"
-        if key not in df_zmean.columns:
+        if key not in row:
             print(f"Mean zscore for {key} not found in df_mean_halflife.csv.")
             return None
-        return float(df_zmean.loc[0, key])
+        return float(row[key])
     except Exception as e:
         print(f"Error loading mean zscore: {e}")
         traceback.print_exc()
@@ -178,17 +469,15 @@ def main():
     print(f"Long Amount: {long_amount:.2f} USDT")
     print(f"Short Amount: {short_amount:.2f} USDT")
 
-    # Load hedge ratio from 'df_cointegrated_pairs.csv'
-    df_hr = pd.read_csv("df_cointegrated_pairs.csv")
+    # Load hedge ratios from 'df_cointegrated_pairs.csv' into a dict keyed
+    # by the sorted pair - an O(1) lookup without the pandas import/parse.
+    hedge_ratios = load_hedge_ratios()
     # Standardize the pair order by sorting.
     pairs = sorted([long_pair.strip(), short_pair.strip()])
-    # Look for either order in the CSV.
-    row = df_hr[((df_hr["sym_1"] == pairs[0]) & (df_hr["sym_2"] == pairs[1])) |
-                ((df_hr["sym_1"] == pairs[1]) & (df_hr["sym_2"] == pairs[0]))]
-    if row.empty:
+    if tuple(pairs) not in hedge_ratios:
         print("Could not find hedge ratio for the given pair combination.")
         return
-    hedge_ratio = row["hedge_ratio"].values[0]
+    hedge_ratio = hedge_ratios[tuple(pairs)]
     print(f"Using hedge ratio: {hedge_ratio}")
 
     # Load mean zscore from 'df_mean_halflife.csv'
@@ -204,20 +493,19 @@ def main():
     # Monitor current z-score and auto-close orders when condition is met.
     if placed_orders:
         print("\nMonitoring current z-score for auto-close conditions...")
-        while True:
-            current_z = get_current_zscore(long_pair, short_pair, hedge_ratio, window=20, timeframe='1h')
-            if current_z is None:
-                print("Failed to compute current z-score, trying again in 5 minutes.")
-            else:
-                print(f"Current z-score for {long_pair}:{short_pair} = {current_z:.2f}")
-                # If current zscore > 0, then close orders when current_z <= mean_zscore.
-                # If current zscore < 0, then close orders when current_z >= mean_zscore.
-                if (current_z > 0 and current_z <= mean_zscore_value) or \
-                   (current_z < 0 and current_z >= mean_zscore_value):
-                    print("Z-score condition met. Closing orders...")
-                    close_orders(placed_orders)
-                    break
-            time.sleep(300)  # Check every 5 minutes.
+        if ccxtpro is not None:
+            # WebSocket push: sub-second updates instead of 5-minute polls.
+            asyncio.run(watch_zscore_until_close(long_pair, short_pair,
+                                                 hedge_ratio, mean_zscore_value))
+            print("Z-score condition met. Closing orders...")
+            close_orders(placed_orders)
+        else:
+            # REST fallback: seed from OHLCV once, then poll both legs with
+            # a single fetch_tickers request every 5 minutes.
+            poll_zscore_until_close(long_pair, short_pair, hedge_ratio,
+                                    mean_zscore_value, window=20, timeframe='1h')
+            print("Z-score condition met. Closing orders...")
+            close_orders(placed_orders)
 
 if __name__ == "__main__":
     main()
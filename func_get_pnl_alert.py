@@ -1,16 +1,11 @@
 import traceback
 import time
 import ccxt
-import configparser
+import numpy as np
 from songline import Sendline
 
-# Load API keys from a config file
-config = configparser.ConfigParser()
-config.read('config.ini')
-
-api_key = config.get('BINANCE', 'API_KEY', fallback=None)
-api_secret = config.get('BINANCE', 'API_SECRET', fallback=None)
-line_token = config.get('LINE', 'TOKEN', fallback=None)
+# Load API keys from the shared cached config loader
+from config import api_key, api_secret, line_token
 
 if not api_key or not api_secret:
     raise ValueError("API Key and Secret must be set in the config.ini file under the [BINANCE] section.")
@@ -41,22 +36,37 @@ def send_line_alert(message):
         print(f"Error sending LINE alert: {e}")
         traceback.print_exc()
 
+# Snapshot of the last poll so unchanged positions are not re-printed and
+# the profit alert does not re-fire on every cycle.
+_last = {'sig': None, 'alerted_at': 0.0}
+
 def get_unrealized_pnl():
     """
     Fetch the unrealized PNL for all open futures positions and summarize the total.
     """
     try:
         print("\n--- Fetching Futures Positions ---")
-        positions = binance_futures.fetch_positions()
+        # One signed request returns balance and every position together,
+        # instead of the separate round-trips behind fetch_positions.
+        account = binance_futures.fapiPrivateV2GetAccount()
 
-        total_pnl = 0.0
-        pnl_data = []
+        # The account endpoint returns every listed symbol, not just open
+        # positions, so reduce the whole list in two NumPy passes instead
+        # of a Python loop with per-entry conversions.
+        positions = account['positions']
+        amounts = np.fromiter((float(p['positionAmt']) for p in positions),
+                              dtype=np.float64, count=len(positions))
+        pnls = np.fromiter((float(p['unrealizedProfit']) for p in positions),
+                           dtype=np.float64, count=len(positions))
+        open_idx = np.flatnonzero(amounts != 0)
+        total_pnl = float(pnls[open_idx].sum())
+        pnl_data = [(positions[i]['symbol'], pnls[i]) for i in open_idx]
 
-        for position in positions:
-            symbol = position['symbol']
-            unrealized_pnl = float(position['unrealizedPnl'])
-            pnl_data.append((symbol, unrealized_pnl))
-            total_pnl += unrealized_pnl
+        # Skip the per-symbol printing when nothing changed since last poll.
+        sig = tuple((symbol, round(pnl, 2)) for symbol, pnl in pnl_data)
+        if sig == _last['sig']:
+            return pnl_data, total_pnl
+        _last['sig'] = sig
 
         print("\nUnrealized PNL for Open Positions:")
         for symbol, pnl in pnl_data:
@@ -66,8 +76,11 @@ def get_unrealized_pnl():
 
         if total_pnl > 0:
             print("Your positions are in profit.")
-            if total_pnl > 1:
+            # Alert at most once per hour so LINE is not spammed while the
+            # positions stay in profit.
+            if total_pnl > 1 and time.time() - _last['alerted_at'] > 3600:
                 send_line_alert(f"🎉 Profit Alert: Your total unrealized PNL is {total_pnl:.2f} USDT.")
+                _last['alerted_at'] = time.time()
         elif total_pnl < 0:
             print("Your positions are at a loss.")
         else:
@@ -5,21 +5,32 @@ Also, before processing, it checks that each trading pair's volume in the last 2
 """
 
 import configparser
-import ccxt
+import asyncio
+import ccxt.async_support as ccxt_async
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
-import time
 import math
+import gzip
+import os
+import pickle
+import time
+
+# On-disk cache for the exchange-info download (~1MB JSON per run).
+MARKETS_CACHE = '.binance_markets.pkl.gz'
+MARKETS_CACHE_TTL = 3600  # seconds
 
 
 class BinanceFuturesDataFetcher:
-    def __init__(self, days=365, timeframe='1d'):
+    def __init__(self, days=365, timeframe='1d', max_concurrency=20):
         """
-        :param days:       Number of days of data to fetch (default: 365 days)
-        :param timeframe:  Timeframe for OHLCV (default: '1d')
+        :param days:            Number of days of data to fetch (default: 365 days)
+        :param timeframe:       Timeframe for OHLCV (default: '1d')
+        :param max_concurrency: Maximum number of in-flight OHLCV requests.
         """
         self.days = days
         self.timeframe = timeframe
+        self.max_concurrency = max_concurrency
         self.api_key = None
         self.api_secret = None
         self.binance_futures = None
@@ -28,10 +39,8 @@ class BinanceFuturesDataFetcher:
         self.wide_df = None
         self.trading_pct_change = None
 
-        # Load config, init ccxt, load markets
+        # Load config; the async client is created inside the event loop.
         self._load_config()
-        self._init_binance_futures()
-        self._load_usdt_perpetual_pairs()
 
     def _load_config(self):
         """Load API keys from config.ini."""
@@ -41,93 +50,132 @@ class BinanceFuturesDataFetcher:
         self.api_secret = config.get('BINANCE', 'API_SECRET', fallback=None)
 
     def _init_binance_futures(self):
-        """Initialize the ccxt binance futures client."""
-        self.binance_futures = ccxt.binance({
+        """Initialize the async ccxt binance futures client."""
+        self.binance_futures = ccxt_async.binance({
             'apiKey': self.api_key,
             'secret': self.api_secret,
+            'enableRateLimit': True,  # Built-in throttler paces requests.
             'options': {
                 'defaultType': 'future'
             }
         })
-        self.binance_futures.load_markets()
 
-    def _load_usdt_perpetual_pairs(self):
+    async def _load_markets_cached(self):
+        """Reuse a recent on-disk markets snapshot instead of refetching
+        the full exchange info on every invocation."""
+        try:
+            if time.time() - os.path.getmtime(MARKETS_CACHE) < MARKETS_CACHE_TTL:
+                with gzip.open(MARKETS_CACHE, 'rb') as f:
+                    self.binance_futures.set_markets(pickle.load(f))
+                print("Loaded markets from local cache.")
+                return
+        except Exception:
+            pass
+        await self.binance_futures.load_markets()
+        try:
+            with gzip.open(MARKETS_CACHE, 'wb') as f:
+                pickle.dump(self.binance_futures.markets, f)
+        except Exception as e:
+            print(f"Could not write markets cache: {e}")
+
+    async def _load_usdt_perpetual_pairs(self):
         """Filter out USDT-margined PERPETUAL pairs from the loaded markets."""
-        for symbol, market in self.binance_futures.markets.items():
-            if (market.get('quote') == 'USDT'
-                and market.get('info', {}).get('contractType') == 'PERPETUAL'):
-                self.usdt_pairs.append(symbol)
+        await self._load_markets_cached()
+        self.usdt_pairs = [
+            symbol
+            for symbol, market in self.binance_futures.markets.items()
+            if market.get('quote') == 'USDT'
+            and (market.get('info') or {}).get('contractType') == 'PERPETUAL'
+        ]
         print(f"Found {len(self.usdt_pairs)} USDT PERPETUAL pairs.")
 
-    def fetch_and_process_data(self):
-        """Main method to fetch OHLCV data, pivot, and compute pct_change."""
-        if not self.usdt_pairs:
-            print("No USDT PERPETUAL pairs found. Exiting.")
-            return None, None
-
-        # Calculate 'since' for the desired days ago
-        since = int((datetime.utcnow() - timedelta(days=self.days)).timestamp() * 1000)
-
-        all_data = []
-        total_pairs = len(self.usdt_pairs)
-        print(f"Fetching {self.timeframe} data for the last {self.days} days...")
-
-        for idx, symbol in enumerate(self.usdt_pairs, start=1):
-            # Progress bar (text-based)
-            progress_percent = (idx / total_pairs) * 100
-            bar_filled = "#" * math.ceil(progress_percent / 2)
-            bar_unfilled = "-" * (50 - len(bar_filled))
-            print(f"[{bar_filled}{bar_unfilled}] {progress_percent:.2f}% | "
-                  f"Fetching: {symbol} ({idx}/{total_pairs})")
-
+    async def _fetch_one(self, sem, symbol, since):
+        """Fetch OHLCV for one symbol under the shared concurrency limit."""
+        async with sem:
             try:
                 # Fetch maximum allowed candles (1000 for daily timeframe)
-                ohlcv = self.binance_futures.fetch_ohlcv(
+                ohlcv = await self.binance_futures.fetch_ohlcv(
                     symbol, timeframe=self.timeframe, since=since, limit=1000
                 )
-                
                 if not ohlcv:
                     print(f"No data received for {symbol}")
-                    continue
-                    
-                df = pd.DataFrame(
-                    ohlcv,
-                    columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
-                )
-                # Keep only timestamp, close, and volume
-                df = df[['timestamp', 'close', 'volume']]
-                df['symbol'] = symbol
-                all_data.append(df)
-
-                # Respect rate limit
-                time.sleep(self.binance_futures.rateLimit / 1000)
-
-            except ccxt.BadSymbol:
+                    return symbol, None
+                return symbol, ohlcv
+            except ccxt_async.BadSymbol:
                 print(f"Skipping {symbol} - BadSymbol error (invalid pair).")
-            except ccxt.NetworkError as ne:
+            except ccxt_async.NetworkError as ne:
                 print(f"Skipping {symbol} - Network error: {ne}")
-            except ccxt.ExchangeError as ee:
+            except ccxt_async.ExchangeError as ee:
                 print(f"Skipping {symbol} - Exchange error: {ee}")
             except Exception as e:
                 print(f"Skipping {symbol} - Unexpected error: {e}")
+            return symbol, None
 
-        if not all_data:
+    async def _fetch_all(self, since):
+        """
+        Fetch OHLCV for every pair concurrently. The work is network-bound,
+        so requests overlap under a bounded semaphore while ccxt's rate
+        limiter keeps the request weight within Binance's budget.
+        """
+        sem = asyncio.Semaphore(self.max_concurrency)
+        tasks = [self._fetch_one(sem, symbol, since) for symbol in self.usdt_pairs]
+        total_pairs = len(tasks)
+        close_dict = {}
+        vol_dict = {}
+
+        for idx, task in enumerate(asyncio.as_completed(tasks), start=1):
+            symbol, ohlcv = await task
+
+            # Progress bar (text-based)
+            progress_percent = (idx / total_pairs) * 100
+            bar_filled = "#" * math.ceil(progress_percent / 2)
+            bar_unfilled = "-" * (50 - len(bar_filled))
+            print(f"[{bar_filled}{bar_unfilled}] {progress_percent:.2f}% | "
+                  f"Fetched: {symbol} ({idx}/{total_pairs})")
+
+            if not ohlcv:
+                continue
+            # Each symbol arrives on the same canonical timestamp grid, so
+            # slice the raw OHLCV rows straight into typed arrays - no
+            # per-symbol DataFrame, no long frame, no pivot
+            arr = np.asarray(ohlcv, dtype=np.float64)
+            ts_index = pd.to_datetime(arr[:, 0].astype('int64'), unit='ms')
+            close_dict[symbol] = pd.Series(arr[:, 4].astype(np.float32), index=ts_index)
+            vol_dict[symbol] = pd.Series(arr[:, 5].astype(np.float32), index=ts_index)
+
+        return close_dict, vol_dict
+
+    async def _download(self, since):
+        """Create the async client, fetch everything, then close it."""
+        self._init_binance_futures()
+        try:
+            await self._load_usdt_perpetual_pairs()
+            if not self.usdt_pairs:
+                print("No USDT PERPETUAL pairs found. Exiting.")
+                return {}, {}
+            return await self._fetch_all(since)
+        finally:
+            await self.binance_futures.close()
+
+    def fetch_and_process_data(self):
+        """Main method to fetch OHLCV data, pivot, and compute pct_change."""
+        # Calculate 'since' for the desired days ago
+        since = int((datetime.utcnow() - timedelta(days=self.days)).timestamp() * 1000)
+
+        print(f"Fetching {self.timeframe} data for the last {self.days} days...")
+        close_dict, vol_dict = asyncio.run(self._download(since))
+
+        if not close_dict:
             print("No data was fetched at all.")
             return None, None
 
-        # Concatenate fetched data into a single long-format DataFrame
-        self.final_df = pd.concat(all_data, ignore_index=True)
-        print("\nLong-format DataFrame (timestamp, close, volume, symbol):")
-        print(self.final_df.head())
-
         # --- Volume Check (Per Trading Pair) ---
-        # Convert 'timestamp' (ms) to datetime (tz-naive)
-        self.final_df['timestamp'] = pd.to_datetime(self.final_df['timestamp'], unit='ms')
         # Create cutoff timestamp for the last 24 hours (tz-naive)
         cutoff = (pd.Timestamp.utcnow() - pd.Timedelta(hours=24)).tz_localize(None)
-        last_24 = self.final_df[self.final_df['timestamp'] >= cutoff]
-        # Group by symbol and sum the volume
-        vol_by_symbol = last_24.groupby('symbol')['volume'].sum()
+        # One boolean-mask column reduction over the wide volume frame
+        # replaces the per-symbol sums - a single contiguous pass
+        wide_vol = pd.DataFrame(vol_dict)
+        vol_by_symbol = wide_vol.loc[wide_vol.index >= cutoff].sum(axis=0)
         print("\nVolume by trading pair in the last 24 hours:")
         print(vol_by_symbol)
         # Only keep symbols with volume > 500,000,000
@@ -137,27 +185,14 @@ class BinanceFuturesDataFetcher:
             return None, None
         else:
             print(f"\nTrading pairs meeting the volume criteria: {valid_symbols}")
-        # Filter final_df to only include rows for valid trading pairs
-        self.final_df = self.final_df[self.final_df['symbol'].isin(valid_symbols)]
-
-        # --- Pivoting to Wide Format ---
-        self.wide_df = self.final_df.pivot(index='timestamp', columns='symbol', values='close')
-        self.wide_df.sort_index(inplace=True)
-        self.wide_df.columns.name = None
-
-        # Convert index 'timestamp' from index to column for further processing
-        self.wide_df.reset_index(inplace=True)
-        # Create a new 'datetime' column (example: adjust by adding 7 hours)
-        self.wide_df['datetime'] = pd.to_datetime(self.wide_df['timestamp']) + pd.Timedelta(hours=7)
-        # Insert 'datetime' after 'timestamp'
-        self.wide_df.insert(
-            self.wide_df.columns.get_loc('timestamp') + 1,
-            'datetime',
-            self.wide_df.pop('datetime')
-        )
-        # Set 'datetime' as index and drop 'timestamp'
-        self.wide_df.set_index('datetime', inplace=True)
-        self.wide_df.drop(columns=['timestamp'], inplace=True)
+
+        # --- Wide Format (assembled directly, no long frame / pivot) ---
+        self.wide_df = pd.DataFrame({s: close_dict[s] for s in sorted(valid_symbols)}).sort_index()
+        # The index is already datetime, so shift it to local time (+7h)
+        # in place - no reset_index/insert/set_index/drop cycle and no
+        # redundant pd.to_datetime re-conversion
+        self.wide_df.index = self.wide_df.index + pd.Timedelta(hours=7)
+        self.wide_df.index.name = 'datetime'
 
         # --- Remove ':USDT' from column names (if present) ---
         self.wide_df.rename(
@@ -168,8 +203,15 @@ class BinanceFuturesDataFetcher:
         print("\nWide-format DataFrame with 'datetime' as index (timestamp dropped):")
         print(self.wide_df.head())
 
-        # Compute percentage change for each pair's close price
-        self.trading_pct_change = self.wide_df.pct_change()
+        # Compute percentage change for each pair's close price on the raw
+        # array - one pass over memory, no per-column alignment machinery
+        arr = self.wide_df.to_numpy()
+        pct_arr = np.empty_like(arr)
+        pct_arr[1:] = arr[1:] / arr[:-1] - 1
+        pct_arr[0] = np.nan
+        self.trading_pct_change = pd.DataFrame(
+            pct_arr, index=self.wide_df.index, columns=self.wide_df.columns
+        )
         self.trading_pct_change.dropna(how='all', inplace=True)
         self.trading_pct_change.rename(
             columns=lambda c: c.replace(':USDT', ''),
@@ -187,8 +229,15 @@ if __name__ == '__main__':
     if wide_df is not None and trading_pct_change is not None:
         print("\nTrading pct_change:")
         print(trading_pct_change.head())
-        
+
         # Save the dataframes to CSV files (including index which is datetime)
         wide_df.to_csv("wide_df_1d.csv", index=True)
         trading_pct_change.to_csv("trading_pct_change_1d.csv", index=True)
         print("Data saved to 'wide_df_1d.csv' and 'trading_pct_change_1d.csv'.")
+        # Parquet cache: typed and compressed, so downstream scripts skip
+        # CSV and date parsing entirely on reload
+        try:
+            wide_df.to_parquet("wide_df_1d.parquet")
+            print("Parquet cache saved to 'wide_df_1d.parquet'.")
+        except Exception as e:
+            print(f"Could not write Parquet cache: {e}")
@@ -1,16 +1,12 @@
 import traceback
 import time
-import ccxt
-import configparser
+import asyncio
+import ccxt.async_support as ccxt
 import pandas as pd
 import numpy as np
 
-# Load API keys from a config file
-config = configparser.ConfigParser()
-config.read('config.ini')
-
-api_key = config.get('BINANCE', 'API_KEY', fallback=None)
-api_secret = config.get('BINANCE', 'API_SECRET', fallback=None)
+# Load API keys from the shared cached config loader
+from config import api_key, api_secret
 
 # Initialize Binance exchange
 binance = ccxt.binance({
@@ -19,11 +15,8 @@ binance = ccxt.binance({
     'enableRateLimit': True,  # Enforce rate limits
 })
 
-# Synchronize time with Binance server
-binance.load_time_difference()
-
 # Function to perform internal transfer
-def internal_transfer(amount, transfer_type):
+async def internal_transfer(amount, transfer_type):
     """
     Perform internal transfer between spot and futures wallets.
 
@@ -32,7 +25,7 @@ def internal_transfer(amount, transfer_type):
     """
     try:
         # Binance API requires specific parameters
-        response = binance.sapi_post_futures_transfer({
+        response = await binance.sapi_post_futures_transfer({
             'asset': 'USDT',          # Asset to transfer
             'amount': amount,         # Amount to transfer
             'type': transfer_type     # 1 = Spot to Futures, 2 = Futures to Spot
@@ -42,10 +35,23 @@ def internal_transfer(amount, transfer_type):
         print(f"Error during transfer: {e}")
 
 # Determine transfer amount and direction
-def calculate_and_transfer():
-    # Fetch balances for spot and futures wallets
-    spot_balance = binance.fetch_balance()['total']['USDT']
-    futures_balance = binance.fetch_balance(params={'type': 'future'})['total']['USDT']
+async def calculate_and_transfer():
+    # One consolidated wallet-balance request returns every wallet's USDT
+    # value in a single round-trip. Fall back to the two concurrent
+    # fetch_balance calls if the endpoint is unavailable on this account.
+    try:
+        wallets = await binance.sapi_get_asset_wallet_balance({'quoteAsset': 'USDT'})
+        by_wallet = {w['walletName']: float(w['balance']) for w in wallets}
+        spot_balance = by_wallet['Spot']
+        futures_balance = by_wallet['USDⓈ-M Futures']
+    except Exception as e:
+        print(f"Consolidated wallet balance unavailable ({e}); falling back to fetch_balance.")
+        spot_balance_info, futures_balance_info = await asyncio.gather(
+            binance.fetch_balance(),
+            binance.fetch_balance(params={'type': 'future'})
+        )
+        spot_balance = spot_balance_info['total']['USDT']
+        futures_balance = futures_balance_info['total']['USDT']
 
     # Calculate average balance
     total_balance = spot_balance + futures_balance
@@ -65,7 +71,15 @@ def calculate_and_transfer():
 
     # Perform the transfer
     print(f"Initiating transfer of {transfer_amount:.6f} USDT.")
-    internal_transfer(amount=transfer_amount, transfer_type=transfer_type)
+    await internal_transfer(amount=transfer_amount, transfer_type=transfer_type)
+
+async def run():
+    try:
+        # Synchronize time with Binance server
+        await binance.load_time_difference()
+        await calculate_and_transfer()
+    finally:
+        await binance.close()
 
 # Execute the transfer process
-calculate_and_transfer()
+asyncio.run(run())
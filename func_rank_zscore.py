@@ -1,12 +1,34 @@
 import pandas as pd
-from func_cointegration import extract_close_prices, calculate_spread, calculate_zscore
+import numpy as np
+from func_cointegration import z_score_window
 
-# Load cointegrated pairs data and select top 50 (sorted by zero_crossings descending)
-df_pairs = pd.read_csv('df_cointegrated_pairs.csv')
+# bottleneck provides C-optimized moving-window kernels; fall back to
+# pandas rolling if it is not installed.
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+# Load cointegrated pairs data and select top 50 (sorted by zero_crossings descending).
+# Only the three columns used below are projected from the Parquet cache.
+try:
+    df_pairs = pd.read_parquet('df_cointegrated_pairs.parquet',
+                               columns=['sym_1', 'sym_2', 'hedge_ratio', 'zero_crossings'])
+except Exception:
+    df_pairs = pd.read_csv('df_cointegrated_pairs.csv')
 top50 = df_pairs.sort_values('zero_crossings', ascending=False).head(50)
 
-# Load wide-format price data (each column is a trading pair's close price)
-wide_df = pd.read_csv('wide_df.csv', index_col='datetime', parse_dates=True)
+# Load wide-format price data (each column is a trading pair's close price).
+# Prefer the Parquet cache written by func_get_prices - typed columnar
+# storage skips the CSV and date parsing on every rerun.
+try:
+    wide_df = pd.read_parquet('wide_df.parquet')
+except Exception:
+    wide_df = pd.read_csv('wide_df.csv', index_col='datetime', parse_dates=True)
+
+# float32 halves the memory footprint and bandwidth of every matrix pass
+# below; single precision is ample for spreads and z-scores.
+wide_df = wide_df.astype(np.float32, copy=False)
 
 # Reset index so that the index is numeric (this ensures that the computed series and final_df align)
 wide_df_reset = wide_df.reset_index()
@@ -15,65 +37,74 @@ wide_df_reset = wide_df.reset_index()
 final_df = pd.DataFrame(index=wide_df_reset.index)
 final_df['datetime'] = wide_df_reset['datetime']
 
-# Loop through each pair in the top 50 list.
-for idx, row in top50.iterrows():
-    sym1 = row['sym_1']
-    sym2 = row['sym_2']
-    hedge_ratio = row['hedge_ratio']
-    pair_name = f"{sym1}:{sym2}"
-    
-    # Check that both symbols exist in wide_df_reset.
-    if sym1 not in wide_df_reset.columns or sym2 not in wide_df_reset.columns:
+# Collect the aligned pair metadata, keeping only pairs whose symbols
+# exist in the wide frame. Membership is tested against a plain set
+# hoisted out of the loop rather than the pandas Index per iteration.
+wide_cols = set(wide_df_reset.columns)
+sym1_list, sym2_list, hr_list, pair_names = [], [], [], []
+for sym1, sym2, hedge_ratio in top50[['sym_1', 'sym_2', 'hedge_ratio']].itertuples(index=False, name=None):
+    if sym1 not in wide_cols or sym2 not in wide_cols:
         continue
+    sym1_list.append(sym1)
+    sym2_list.append(sym2)
+    hr_list.append(hedge_ratio)
+    pair_names.append(f"{sym1}:{sym2}")
 
-    # Extract the price data for the pair and drop missing values.
-    df_pair = wide_df_reset[[sym1, sym2]].dropna()
-    if df_pair.empty:
-        continue
-    
-    # Extract prices (as numpy arrays) using your extraction function.
-    prices1 = extract_close_prices(df_pair[sym1])
-    prices2 = extract_close_prices(df_pair[sym2])
-    
-    # Calculate spread and zscore using the hedge ratio.
-    spread = calculate_spread(prices1, prices2, hedge_ratio)
-    zscore = calculate_zscore(spread)
-    
-    # Build Series for the computed values using the index of df_pair.
-    spread_series = pd.Series(spread, index=df_pair.index)
-    zscore_series = pd.Series(zscore, index=df_pair.index)
-    
-    # Directly assign these values into final_df for the indices present in df_pair.
-    final_df.loc[df_pair.index, f"{pair_name}_spread"] = spread_series
-    final_df.loc[df_pair.index, f"{pair_name}_zscore"] = zscore_series
+# Compute every spread at once: one matrix subtraction over all pairs
+# replaces the per-pair slicing, extraction and Series construction.
+P1 = wide_df_reset[sym1_list].to_numpy(dtype=np.float32)
+P2 = wide_df_reset[sym2_list].to_numpy(dtype=np.float32)
+H = np.asarray(hr_list, dtype=np.float32)
+spread_mat = P1 - P2 * H[None, :]
+
+# Rolling z-scores for every pair in one column-wise pass over the
+# spread matrix instead of K separate rolling calls.
+if bn is not None:
+    mu = bn.move_mean(spread_mat, window=z_score_window, min_count=z_score_window, axis=0)
+    sd = bn.move_std(spread_mat, window=z_score_window, min_count=z_score_window, ddof=1, axis=0)
+else:
+    rolling = pd.DataFrame(spread_mat).rolling(window=z_score_window)
+    mu = rolling.mean().to_numpy()
+    sd = rolling.std().to_numpy()
+with np.errstate(divide='ignore', invalid='ignore'):
+    zscore_mat = (spread_mat - mu) / sd
+
+# Assemble all spread/z-score columns in a single concat instead of
+# inserting columns one at a time, which re-copies the frame per column.
+spread_df = pd.DataFrame(spread_mat, index=final_df.index,
+                         columns=[f"{p}_spread" for p in pair_names])
+zscore_df = pd.DataFrame(zscore_mat, index=final_df.index,
+                         columns=[f"{p}_zscore" for p in pair_names])
+# Interleave the columns so each pair's spread sits next to its z-score.
+pair_cols = [col for p in pair_names for col in (f"{p}_spread", f"{p}_zscore")]
+final_df = pd.concat([final_df, spread_df, zscore_df], axis=1)[['datetime'] + pair_cols]
 
 # Sort the final DataFrame by the numeric index and save.
 final_df.sort_index(inplace=True)
 final_df.to_csv("df_top50_coint.csv", index=False)
 print("Saved final results to 'df_top50_coint.csv'.")
+# Parquet cache for func_mean_halflife to reload without re-parsing.
+try:
+    final_df.to_parquet("df_top50_coint.parquet", index=False)
+except Exception as e:
+    print(f"Could not write Parquet cache: {e}")
 
 # ---------------------------------------------------------
 # Print the top 10 highest and lowest z-score trading pairs
 # based on the LAST row in final_df.
 # ---------------------------------------------------------
 
-# 1) Identify all columns that end with "_zscore"
-zscore_cols = [col for col in final_df.columns if col.endswith("_zscore") and col != "datetime"]
+# 1) Reuse the pair metadata collected above instead of re-scanning the
+#    column names for the "_zscore" suffix.
+zscore_cols = [f"{p}_zscore" for p in pair_names]
 
 # 2) Get the last row for these columns.
 if not final_df.empty:
     last_row_index = final_df.index[-1]
     zscore_values = final_df.loc[last_row_index, zscore_cols]
-    
+
     # 3) Build a Series mapping "sym1:sym2" -> zscore_value
-    pairs_zscore = {}
-    for col in zscore_cols:
-        # Example: "BTC/USDT:ETH/USDT_zscore" becomes "BTC/USDT:ETH/USDT"
-        pair_name = col.replace("_zscore", "")
-        val = zscore_values[col]
-        pairs_zscore[pair_name] = val
-
-    zscore_series = pd.Series(pairs_zscore)
+    zscore_series = pd.Series(zscore_values.values, index=pair_names)
 
     # 4) Sort descending to find highest and ascending for lowest.
     zscore_sorted = zscore_series.sort_values(ascending=False)
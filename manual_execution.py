@@ -1,128 +1,441 @@
-import traceback
-import time
-import ccxt
-
-api_key = api_key 
-api_secret = api_secret
-
-# Initialize the Binance API with auto time synchronization
-binance_futures = ccxt.binanceusdm({
-    'apiKey': api_key,
-    'secret': api_secret,
-    'enableRateLimit': True,
-    'options': {
-        'adjustForTimeDifference': True  # Automatically sync time difference
-    }
-})
-
-def place_orders(long_pair, short_pair, percentage):
-    """
-    Place a long and short order on the futures market.
-    """
-    try:
-        print("\n--- Fetching Balances ---")
-        futures_balance_info = binance_futures.fetch_balance(params={'type': 'future'})
-        futures_free_margin = float(futures_balance_info['free']['USDT'])
-        print(f"Futures Free Margin: {futures_free_margin:.2f} USDT")
-
-        # Calculate trade amounts
-        print("\n--- Calculating Trade Amounts ---")
-        futures_trade_amount = (percentage / 100) * futures_free_margin
-        print(f"Calculated Futures Trade Amount: {futures_trade_amount:.2f} USDT")
-
-        if futures_trade_amount > futures_free_margin:
-            raise ValueError(f"Insufficient futures free margin. Available: {futures_free_margin:.2f}, Required: {futures_trade_amount:.2f}")
-
-        # Fetch the current prices for long and short pairs
-        print("\n--- Fetching Current Prices ---")
-        long_price = binance_futures.fetch_ticker(long_pair)['last']
-        short_price = binance_futures.fetch_ticker(short_pair)['last']
-        print(f"Long Pair ({long_pair}) Price: {long_price:.4f} USDT")
-        print(f"Short Pair ({short_pair}) Price: {short_price:.4f} USDT")
-
-        # Calculate quantities to trade
-        long_quantity = futures_trade_amount / long_price
-        short_quantity = futures_trade_amount / short_price
-        print(f"Placing Orders: Long {long_pair} ({long_quantity:.4f}) and Short {short_pair} ({short_quantity:.4f})")
-
-        # Place long order
-        print("\n--- Placing Long Order ---")
-        long_order = binance_futures.create_order(
-            symbol=long_pair,
-            type='market',
-            side='buy',
-            amount=long_quantity
-        )
-        print(f"Long Order Placed: {long_order['id']} | Status: {long_order['status']} | Filled: {long_order['filled']}")
-
-        # Place short order
-        print("\n--- Placing Short Order ---")
-        short_order = binance_futures.create_order(
-            symbol=short_pair,
-            type='market',
-            side='sell',
-            amount=short_quantity
-        )
-        print(f"Short Order Placed: {short_order['id']} | Status: {short_order['status']} | Filled: {short_order['filled']}")
-
-        return [long_order, short_order]
-
-    except ccxt.InsufficientFunds as e:
-        print(f"\nError: Insufficient funds - {e}")
-        print("Tip: Check your futures free margin or reduce the trade percentage.")
-    except Exception as e:
-        print(f"\nError: {e}")
-        traceback.print_exc()
-        return []
-
-def close_orders(orders):
-    """
-    Close all the provided orders.
-    """
-    try:
-        for order in orders:
-            symbol = order['symbol']
-            side = 'sell' if order['side'] == 'buy' else 'buy'
-            amount = order['amount']
-
-            binance_futures.create_order(
-                symbol=symbol,
-                type='market',
-                side=side,
-                amount=amount
-            )
-            print(f"Closed order for {symbol}, Amount: {amount:.4f}")
-    except Exception as e:
-        print(f"Error closing orders: {e}")
-
-def main():
-    print("Welcome to the Crypto Trade Program!")
-
-    # Prompt the user for inputs
-    long_pair = input("Enter the crypto pair to Long (e.g., XXX/USDT): ")
-    short_pair = input("Enter the crypto pair to Short (e.g., YYY/USDT): ")
-    percentage = float(input("Enter the percentage of your wallet to use (e.g., 50): "))
-    half_life = float(input("Enter the half-life in hours to automatically close orders (e.g., 2.5): "))
-
-    print("\nSummary of your input:")
-    print(f"Long Pair: {long_pair}")
-    print(f"Short Pair: {short_pair}")
-    print(f"Percentage: {percentage}%")
-    print(f"Half-Life: {half_life} hours\n")
-
-    confirm = input("Do you want to proceed with these values? (yes/no): ").strip().lower()
-
-    if confirm == "yes":
-        print("Executing trades...")
-        placed_orders = place_orders(long_pair, short_pair, percentage)
-
-        if placed_orders:
-            print(f"Waiting {half_life} hours to automatically close orders...")
-            time.sleep(half_life * 3600)
-            print("Closing orders...")
-            close_orders(placed_orders)
-    else:
-        print("Trade execution cancelled.")
-
-if __name__ == "__main__":
-    main()
+import argparse
+import atexit
+import time
+import asyncio
+import base64
+import functools
+import hashlib
+import hmac
+import json
+import logging
+import logging.handlers
+import queue
+import uuid
+import aiohttp
+import numpy as np
+import ccxt.async_support as ccxt
+
+# orjson decodes Binance's nested response bodies several times faster
+# than stdlib json; fall back to ccxt's default parser without it.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Load API keys from the shared cached config loader
+from config import api_key, api_secret
+from exchange_utils import TTLCache, parse_batch_order
+
+# Queue-backed logging: the trading path only pays a queue.put per
+# message while a background thread drains to stdout, so a slow TTY or
+# piped file never blocks the event loop mid-submission.
+_log_queue = queue.SimpleQueue()
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+if not api_key or not api_secret:
+    raise ValueError("API Key and Secret must be set in the config.ini file under the [BINANCE] section.")
+
+@functools.lru_cache(maxsize=2)
+def get_client(role='market'):
+    """
+    One shared ccxt client per role, cached for the life of the process.
+    Recreating a client per trade would rebuild the aiohttp session and
+    connection pool and re-sync the server time offset on every call.
+    The 'trade' role gets its own client - and therefore its own
+    keep-alive connection pool - so an order submit never queues behind
+    an in-flight balance or ticker request on the 'market' pool.
+    """
+    client = ccxt.binanceusdm({
+        'apiKey': api_key,
+        'secret': api_secret,
+        'enableRateLimit': True,
+        # Tight timeout: a stalled request fails fast and is retried (or
+        # disambiguated, for orders) instead of blocking for ccxt's 10s
+        # default while one leg may already be live.
+        'timeout': 1500,
+        'options': {
+            'adjustForTimeDifference': True  # Automatically sync time difference
+        }
+    })
+    if orjson is not None:
+        def _parse_json_fast(http_response):
+            """orjson-backed replacement for ccxt's response JSON decode."""
+            try:
+                return orjson.loads(http_response)
+            except Exception:
+                return None
+        client.parse_json = _parse_json_fast
+
+    # Signing runs the HMAC key schedule from the raw secret on every
+    # private call; cloning a pre-keyed template skips that per request.
+    secret_bytes = api_secret.encode()
+    template = hmac.new(secret_bytes, digestmod=hashlib.sha256)
+
+    def _hmac_fast(request, secret, algorithm=hashlib.sha256, digest='hex'):
+        if secret != secret_bytes or algorithm is not hashlib.sha256:
+            return ccxt.Exchange.hmac(request, secret, algorithm, digest)
+        h = template.copy()
+        h.update(request)
+        binary = h.digest()
+        if digest == 'hex':
+            return binary.hex()
+        if digest == 'base64':
+            return base64.b64encode(binary).decode()
+        return binary
+
+    client.hmac = _hmac_fast
+    return client
+
+# Initialize the Binance API with auto time synchronization.
+# Market-data reads and order submissions ride separate clients so the
+# order path never waits behind a market-data round-trip.
+binance_futures = get_client('market')
+binance_trade = get_client('trade')
+
+# Short-TTL cache for the balance lookup so retries and back-to-back
+# invocations in the same run do not repeat the signed round-trip.
+_api_cache = TTLCache(ttl=5.0)
+
+# Binance fronts fapi.binance.com with several edge nodes whose round
+# trips can differ by hundreds of ms depending on which one DNS hands
+# out; the numbered hosts address them directly.
+FAPI_HOSTS = ('fapi.binance.com', 'fapi1.binance.com',
+              'fapi2.binance.com', 'fapi3.binance.com')
+
+async def pin_fastest_endpoint(exchange, hosts=FAPI_HOSTS, probes=2):
+    """
+    Probe the unauthenticated ping endpoint on each candidate host and
+    rewrite the client's API URLs to the lowest-latency one. Hosts that
+    fail or time out are skipped; if every probe fails the default URLs
+    are left untouched.
+    """
+    timeout = aiohttp.ClientTimeout(total=2)
+
+    async def probe(session, host):
+        best = None
+        for _ in range(probes):
+            start = time.monotonic()
+            try:
+                async with session.get(f"https://{host}/fapi/v1/ping") as resp:
+                    if resp.status != 200:
+                        continue
+                    await resp.read()
+            except Exception:
+                continue
+            elapsed = time.monotonic() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return host, best
+
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        results = await asyncio.gather(*[probe(session, h) for h in hosts])
+    timings = {host: t for host, t in results if t is not None}
+    if not timings:
+        return
+    winner = min(timings, key=timings.get)
+    if winner != hosts[0]:
+        default = hosts[0]
+
+        def _swap(node):
+            if isinstance(node, str):
+                return node.replace(default, winner)
+            if isinstance(node, dict):
+                return {key: _swap(value) for key, value in node.items()}
+            return node
+
+        exchange.urls['api'] = _swap(exchange.urls['api'])
+    logger.info(f"Using Binance futures endpoint {winner} ({timings[winner] * 1000:.0f} ms)")
+
+async def _with_retry(fn, *args, attempts=2, **kwargs):
+    """
+    One fast retry for idempotent reads. Order submissions never go
+    through here - a timed-out submit must be disambiguated by client
+    order id, not blindly resent.
+    """
+    for attempt in range(attempts):
+        try:
+            return await fn(*args, **kwargs)
+        except (ccxt.RequestTimeout, ccxt.NetworkError):
+            if attempt == attempts - 1:
+                raise
+            logger.warning("Request timed out; retrying once...")
+
+async def _fetch_order_raw(symbol, client_order_id):
+    """
+    Resolve a possibly-unacknowledged order by its client id. Returns
+    the exchange's raw order dict when it landed, or a rejected-shaped
+    dict when it never reached the engine.
+    """
+    try:
+        order = await binance_futures.fetch_order(
+            None, symbol, params={'origClientOrderId': client_order_id})
+        return order['info']
+    except Exception as e:
+        return {'msg': f'not found after timeout ({e})'}
+
+def quantize_amounts(pairs, amounts):
+    """
+    Quantize a basket of leg amounts to each market's lot step in one
+    vectorized pass (floor(amount / step) * step; binanceusdm precision
+    is TICK_SIZE, so precision['amount'] is the step itself). Returns
+    decimal strings rendered at the step's own precision, ready for the
+    raw batch payload. Raises if any leg floors to zero - the exchange
+    would reject a zero quantity anyway, and the error here names the
+    market instead of surfacing as a filter failure mid-batch.
+    """
+    # market() resolves the spot-style names this script prompts for to
+    # the unified swap entries; binance_futures.markets itself is keyed
+    # by XXX/USDT:USDT.
+    steps = np.array([float(binance_futures.market(p)['precision']['amount'])
+                      for p in pairs])
+    quantized = np.floor(np.asarray(amounts, dtype=np.float64) / steps) * steps
+    if not (quantized > 0).all():
+        too_small = [p for p, q in zip(pairs, quantized) if q <= 0]
+        raise ValueError(f"Trade amount is below one lot step for: {', '.join(too_small)}")
+    decimals = np.maximum(0, -np.floor(np.log10(steps)).astype(int))
+    return [f"{q:.{d}f}" for q, d in zip(quantized, decimals)]
+
+async def fetch_balance_cached():
+    """Fetch the futures balance, reusing a recent result if available."""
+    value = _api_cache.get('balance')
+    if value is None:
+        value = await _with_retry(binance_futures.fetch_balance, params={'type': 'future'})
+        _api_cache.set('balance', value)
+    return value
+
+async def place_orders(long_pair, short_pair, percentage):
+    """
+    Place a long and short order on the futures market.
+    """
+    try:
+        # The balance is still needed to size the trade (the amount is a
+        # percentage of free margin), but repeats within the TTL are free.
+        logger.info("--- Fetching Balances ---")
+        futures_balance_info = await fetch_balance_cached()
+        futures_free_margin = float(futures_balance_info['free']['USDT'])
+        logger.info(f"Futures Free Margin: {futures_free_margin:.2f} USDT")
+
+        # Calculate trade amounts
+        logger.info("--- Calculating Trade Amounts ---")
+        futures_trade_amount = (percentage / 100) * futures_free_margin
+        logger.info(f"Calculated Futures Trade Amount: {futures_trade_amount:.2f} USDT")
+
+        if futures_trade_amount > futures_free_margin:
+            raise ValueError(f"Insufficient futures free margin. Available: {futures_free_margin:.2f}, Required: {futures_trade_amount:.2f}")
+
+        # Load markets only once per process so create_order never pays
+        # the lazy exchange-info download, and precision data is on hand.
+        if not binance_futures.markets:
+            await binance_futures.load_markets()
+            # The trade client reuses the snapshot instead of paying its
+            # own exchange-info download on the first order.
+            binance_trade.set_markets(binance_futures.markets)
+
+        # Both last prices come back in a single batched request.
+        logger.info("--- Fetching Current Prices ---")
+        tickers = await _with_retry(binance_futures.fetch_tickers, [long_pair, short_pair])
+        # fetch_tickers keys its result by unified swap symbols
+        # (XXX/USDT:USDT), not the spot-style names this script prompts
+        # for; market() maps either form onto the unified entry.
+        long_price = tickers[binance_futures.market(long_pair)['symbol']]['last']
+        short_price = tickers[binance_futures.market(short_pair)['symbol']]['last']
+        logger.info(f"Long Pair ({long_pair}) Price: {long_price:.4f} USDT")
+        logger.info(f"Short Pair ({short_pair}) Price: {short_price:.4f} USDT")
+
+        # Calculate quantities to trade, quantized to each market's lot
+        # size up front - the raw batch endpoint does not round for us.
+        # One vectorized pass covers every leg, so this scales to a
+        # portfolio of spreads without per-leg string math.
+        long_qty, short_qty = quantize_amounts(
+            [long_pair, short_pair],
+            [futures_trade_amount / long_price, futures_trade_amount / short_price]
+        )
+        long_quantity = float(long_qty)
+        short_quantity = float(short_qty)
+        logger.info(f"Placing Orders: Long {long_pair} ({long_quantity:.4f}) and Short {short_pair} ({short_quantity:.4f})")
+
+        # Submit both legs in a single signed batchOrders request so the
+        # matching engine receives them together - one round-trip, one
+        # signature, minimal leg-to-leg skew.
+        logger.info("--- Placing Orders ---")
+        long_cid = f"x-{uuid.uuid4().hex[:24]}"
+        short_cid = f"x-{uuid.uuid4().hex[:24]}"
+        batch = [
+            {
+                'symbol': long_pair.replace('/', ''),
+                'side': 'BUY',
+                'type': 'MARKET',
+                'quantity': long_qty,
+                'newClientOrderId': long_cid,
+                'newOrderRespType': 'ACK'
+            },
+            {
+                'symbol': short_pair.replace('/', ''),
+                'side': 'SELL',
+                'type': 'MARKET',
+                'quantity': short_qty,
+                'newClientOrderId': short_cid,
+                'newOrderRespType': 'ACK'
+            }
+        ]
+        try:
+            raw_long, raw_short = await binance_trade.fapiPrivatePostBatchOrders({
+                'batchOrders': json.dumps(batch)
+            })
+        except (ccxt.RequestTimeout, ccxt.NetworkError):
+            # The batch may or may not have reached the engine. Look both
+            # legs up by client order id instead of resubmitting blind -
+            # a leg that never landed resolves as rejected and the unwind
+            # below then flattens whichever leg did fill.
+            logger.warning("Batch submit timed out; resolving leg status by client order id...")
+            raw_long, raw_short = await asyncio.gather(
+                _fetch_order_raw(long_pair, long_cid),
+                _fetch_order_raw(short_pair, short_cid)
+            )
+
+        # The batch is not atomic: entries fail independently. If exactly
+        # one leg was rejected, reverse the accepted leg immediately so
+        # the book is never one-sided.
+        long_ok = 'orderId' in raw_long
+        short_ok = 'orderId' in raw_short
+        if long_ok != short_ok:
+            pair, side, qty, rejected = (
+                (long_pair, 'sell', long_quantity, raw_short) if long_ok
+                else (short_pair, 'buy', short_quantity, raw_long)
+            )
+            logger.warning(f"One leg rejected ({rejected.get('msg', rejected)}); reversing the filled leg {pair}...")
+            await binance_trade.create_order(
+                symbol=pair,
+                type='market',
+                side=side,
+                amount=qty
+            )
+            # The book is flat again; the except handler below must not
+            # reverse this leg a second time when the rejected leg's
+            # parse raises.
+            leg_unwound = True
+        long_order = parse_batch_order(raw_long, long_pair, 'buy', long_quantity)
+        short_order = parse_batch_order(raw_short, short_pair, 'sell', short_quantity)
+        # ACK responses carry no fill info - the engine answers as soon
+        # as the orders are accepted, so only the ids are reported here.
+        logger.info(f"Long Order Placed: {long_order['id']} | Status: {long_order['status']}")
+        logger.info(f"Short Order Placed: {short_order['id']} | Status: {short_order['status']}")
+
+        # The balance is stale once the orders fill.
+        _api_cache.clear()
+
+        return [long_order, short_order]
+
+    except ccxt.InsufficientFunds as e:
+        logger.error(f"Insufficient funds - {e}")
+        logger.error("Tip: Check your futures free margin or reduce the trade percentage.")
+    except Exception:
+        # Hedge before diagnosing: if a leg is known live and was not
+        # already reversed above, flatten it first - formatting frames
+        # can wait, a one-sided position cannot.
+        frame = locals()
+        live = [order for order in (frame.get('long_order'), frame.get('short_order'))
+                if order is not None]
+        if live and not frame.get('leg_unwound'):
+            await close_orders(live)
+        logger.exception("Error placing orders",
+                         extra={'long': long_pair, 'short': short_pair})
+        return []
+
+async def close_orders(orders):
+    """
+    Close all the provided orders with one signed batchOrders request.
+    The reverse orders carry reduceOnly so a stale amount can shrink but
+    never flip a position, and every leg unwinds in the same round-trip.
+    """
+    try:
+        batch = [
+            {
+                'symbol': order['symbol'].replace('/', ''),
+                'side': 'SELL' if order['side'] == 'buy' else 'BUY',
+                'type': 'MARKET',
+                'quantity': f"{order['amount']}",
+                'reduceOnly': 'true'
+            }
+            for order in orders
+        ]
+        raw_orders = await binance_trade.fapiPrivatePostBatchOrders({
+            'batchOrders': json.dumps(batch)
+        })
+        for order, raw in zip(orders, raw_orders):
+            if 'orderId' in raw:
+                logger.info(f"Closed order for {order['symbol']}, Amount: {order['amount']:.4f}")
+            else:
+                logger.error(f"Error closing order for {order['symbol']}: {raw.get('msg', raw)}")
+    except Exception:
+        logger.exception("Error closing orders")
+
+def parse_args(argv=None):
+    """CLI arguments; anything omitted is prompted for interactively."""
+    parser = argparse.ArgumentParser(
+        description="Open a long/short futures spread and auto-close it after its half-life.")
+    parser.add_argument('--long', dest='long_pair', metavar='PAIR',
+                        help="crypto pair to Long, e.g. XXX/USDT")
+    parser.add_argument('--short', dest='short_pair', metavar='PAIR',
+                        help="crypto pair to Short, e.g. YYY/USDT")
+    parser.add_argument('--pct', type=float,
+                        help="percentage of the wallet to use, e.g. 50")
+    parser.add_argument('--half-life', type=float,
+                        help="hours before the orders are closed automatically, e.g. 2.5")
+    parser.add_argument('--yes', action='store_true',
+                        help="skip the confirmation prompt")
+    return parser.parse_args(argv)
+
+async def main():
+    args = parse_args()
+    print("Welcome to the Crypto Trade Program!")
+
+    # Pull inputs from the CLI when given so the script can run from a
+    # scheduler with no human in the loop; prompt only for the rest.
+    long_pair = args.long_pair or input("Enter the crypto pair to Long (e.g., XXX/USDT): ")
+    short_pair = args.short_pair or input("Enter the crypto pair to Short (e.g., YYY/USDT): ")
+    percentage = args.pct if args.pct is not None else \
+        float(input("Enter the percentage of your wallet to use (e.g., 50): "))
+    half_life = args.half_life if args.half_life is not None else \
+        float(input("Enter the half-life in hours to automatically close orders (e.g., 2.5): "))
+
+    print("\nSummary of your input:")
+    print(f"Long Pair: {long_pair}")
+    print(f"Short Pair: {short_pair}")
+    print(f"Percentage: {percentage}%")
+    print(f"Half-Life: {half_life} hours\n")
+
+    confirm = "yes" if args.yes else \
+        input("Do you want to proceed with these values? (yes/no): ").strip().lower()
+
+    if confirm == "yes":
+        print("Executing trades...")
+        placed_orders = await place_orders(long_pair, short_pair, percentage)
+
+        if placed_orders:
+            print(f"Waiting {half_life} hours to automatically close orders...")
+            # asyncio.sleep instead of time.sleep: the event loop stays
+            # free while the half-life window elapses, the wait is
+            # cancellable (Ctrl-C unwinds cleanly through asyncio.run),
+            # and sibling monitoring tasks can run concurrently on the
+            # same client.
+            await asyncio.sleep(half_life * 3600)
+            print("Closing orders...")
+            await close_orders(placed_orders)
+    else:
+        print("Trade execution cancelled.")
+
+async def run():
+    try:
+        await pin_fastest_endpoint(binance_futures)
+        binance_trade.urls['api'] = binance_futures.urls['api']
+        await main()
+    finally:
+        await asyncio.gather(binance_futures.close(), binance_trade.close())
+
+if __name__ == "__main__":
+    asyncio.run(run())